@@ -7,8 +7,9 @@ from reportlab.platypus import (SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet
 from datetime import datetime, timedelta
 from pathlib import Path
-import pandas as pd, json, sys, os, sqlite3
+import pandas as pd, json, sys, os
 from PIL import Image, ImageTk
+from storage import SQLiteStore, ServerStore
 
 # ── PATH HELPERS ───────────────────────────────────────────────────────
 
@@ -31,61 +32,45 @@ def user_path(rel: str) -> Path:
 
 # ── DATABASE SETUP ─────────────────────────────────────────────────────
 
-def get_db():
-    db_path = user_path("data/tips_data.db")
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row 
-    return conn
-
-def init_db():
-    conn = get_db()
-    cursor = conn.cursor()
-    # No "Role" column, just Name and Points
-    cursor.execute('''CREATE TABLE IF NOT EXISTS staff (
-        StaffID INTEGER PRIMARY KEY AUTOINCREMENT,
-        StaffName TEXT UNIQUE,
-        Points REAL
-    )''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS tip_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT,
-        staff_name TEXT,
-        points REAL,
-        share REAL,
-        kitchen REAL,
-        damage REAL
-    )''')
-    conn.commit()
-    conn.close()
-
-init_db() 
+# Local SQLite file by default. Set TIPS_DB_DSN to a PostgreSQL DSN to use a
+# pooled server database instead (see storage.py for the other backends).
+# If the server can't be reached, fall back to the local file and tell the
+# user once the window is up.
+db_dsn, store_error = os.getenv("TIPS_DB_DSN"), None
+store = None
+if db_dsn:
+    try:
+        store = ServerStore.from_dsn(db_dsn)
+    except Exception as e:
+        store_error = str(e)  # not the exception: its traceback pins the half-built store
+if store is None:
+    store = SQLiteStore(user_path("data/tips_data.db"))
 
 # Default password is '1234' for testing.
 # In production, set the MANAGER_PASSWORD environment variable.
 manager_password = os.getenv("MANAGER_PASSWORD", "1234")
 
 # ── HELPER FOR REPORTS ────────────────────────────────────────────────
-def get_logs_df():
-    """Reads the entire SQL log table into a Pandas DataFrame for reporting."""
-    conn = get_db()
-    try:
-        df = pd.read_sql_query("SELECT * FROM tip_logs", conn)
-        # Rename columns to match what your report functions expect
-        # SQL: staff_name -> DF: Staff
-        # SQL: share -> DF: Share (€) ... etc
-        df = df.rename(columns={
-            "date": "Date",
-            "staff_name": "Staff",
-            "points": "Points",
-            "share": "Share (€)",
-            "kitchen": "Kitchen (€)",
-            "damage": "Damage (€)"
-        })
-        if not df.empty:
-            df["Date"] = pd.to_datetime(df["Date"])
-        return df
-    finally:
-        conn.close()
+def get_logs_df(fr=None, to=None):
+    """Reads the log table (optionally a date range) into a Pandas DataFrame for reporting."""
+    fr = fr.strftime("%Y-%m-%d") if fr is not None else None
+    to = to.strftime("%Y-%m-%d") if to is not None else None
+    df = pd.DataFrame(store.logs_between(fr, to),
+                      columns=["id", "date", "staff_name", "points", "share", "kitchen", "damage"])
+    # Rename columns to match what your report functions expect
+    # SQL: staff_name -> DF: Staff
+    # SQL: share -> DF: Share (€) ... etc
+    df = df.rename(columns={
+        "date": "Date",
+        "staff_name": "Staff",
+        "points": "Points",
+        "share": "Share (€)",
+        "kitchen": "Kitchen (€)",
+        "damage": "Damage (€)"
+    })
+    if not df.empty:
+        df["Date"] = pd.to_datetime(df["Date"])
+    return df
 
 # ── GUI – ROOT WINDOW ─────────────────────────────────────────────────
 root = tk.Tk()
@@ -99,6 +84,10 @@ try:
     tk.Label(root, image=logo_photo, bd=0).place(relx=.5, rely=.75, anchor="center")
 except: pass # safe fail if logo missing
 
+if store_error:
+    messagebox.showwarning("Database", f"Could not connect to the server database:\n{store_error}\n\n"
+                                       "Using the local tips file instead.")
+
 # Variables
 tip_var   = tk.StringVar()
 date_var  = tk.StringVar(value=datetime.today().strftime("%Y-%m-%d"))
@@ -206,10 +195,7 @@ def refresh_staff_checklist():
     worked.clear()
     for w in staff_frame.winfo_children(): w.destroy()
 
-    conn = get_db()
-    query = "SELECT StaffID, StaffName, Points FROM staff ORDER BY Points DESC, StaffName ASC"
-    staff_rows = conn.execute(query).fetchall()
-    conn.close()
+    staff_rows = store.list_staff(order_by="points")
 
     for row in staff_rows:
         var = tk.IntVar()
@@ -237,20 +223,11 @@ def save_tips():
         net = round(tips - k_share - d_share, 2)
         point_val = round(net / total_points, 2) if total_points > 0 else 0
 
-        conn = get_db()
-        # Overwrite previous entry for this date
-        conn.execute("DELETE FROM tip_logs WHERE date = ?", (work_date,))
-        
-        for name, pts in chosen:
-            share = round((pts / total_points) * net, 2)
-            conn.execute("INSERT INTO tip_logs (date, staff_name, points, share, kitchen, damage) VALUES (?, ?, ?, ?, ?, ?)",
-                         (work_date, name, pts, share, 0, 0))
-        
+        rows = [(name, pts, round((pts / total_points) * net, 2), 0, 0) for name, pts in chosen]
         # Total Row
-        conn.execute("INSERT INTO tip_logs (date, staff_name, points, share, kitchen, damage) VALUES (?, ?, ?, ?, ?, ?)",
-                     (work_date, "TOTAL", 0, net, k_share, d_share))
-        conn.commit()
-        conn.close()
+        rows.append(("TOTAL", 0, net, k_share, d_share))
+        # Overwrite previous entry for this date
+        store.record_day(work_date, rows)
         
         messagebox.showinfo("Saved", f"Success!\n1 point = €{point_val}")
         tip_var.set(""); [v.set(0) for _, v in worked]
@@ -261,10 +238,7 @@ def open_remove_staff_window():
     win = tk.Toplevel(root); win.geometry("300x420")
     lb = tk.Listbox(win, selectmode="extended", width=28, height=15)
     
-    conn = get_db()
-    names = conn.execute("SELECT StaffName FROM staff ORDER BY StaffName").fetchall()
-    conn.close()
-    for row in names: lb.insert(tk.END, row["StaffName"])
+    for row in store.list_staff(order_by="name"): lb.insert(tk.END, row["StaffName"])
     lb.pack(pady=5)
 
     def remove_selected():
@@ -273,10 +247,7 @@ def open_remove_staff_window():
         names = [lb.get(i) for i in idxs]
         if not messagebox.askyesno("Confirm", f"Remove {len(names)} staff?"): return
         
-        conn = get_db()
-        for name in names:
-            conn.execute("DELETE FROM staff WHERE StaffName = ?", (name,))
-        conn.commit(); conn.close()
+        store.remove_staff(names)
         refresh_staff_checklist(); win.destroy()
         messagebox.showinfo("Removed", "Staff deleted.")
 
@@ -304,9 +275,7 @@ def open_point_editor():
     win = tk.Toplevel(root); win.geometry("600x750")
     frm = tk.Frame(win); frm.pack()
     
-    conn = get_db()
-    staff_data = conn.execute("SELECT StaffID, StaffName, Points FROM staff").fetchall()
-    conn.close()
+    staff_data = store.list_staff()
 
     ents = []
     for i, row in enumerate(staff_data):
@@ -316,15 +285,12 @@ def open_point_editor():
         ents.append((row["StaffID"], v))
 
     def save():
-        conn = get_db()
         try:
             for sid, v in ents:
-                conn.execute("UPDATE staff SET Points = ? WHERE StaffID = ?", 
-                             (float(v.get().replace(",",".")), sid))
-            conn.commit(); refresh_staff_checklist(); win.destroy()
+                store.update_points(sid, float(v.get().replace(",",".")))
+            refresh_staff_checklist(); win.destroy()
             messagebox.showinfo("Saved", "Points updated")
         except Exception as e: messagebox.showerror("Error", str(e))
-        finally: conn.close()
 
     tk.Button(win, text="Save Changes", command=save).pack(pady=10)
 
@@ -345,12 +311,10 @@ def open_add_staff_window():
     def save():
         name = n_var.get().strip(); pts = p_var.get().strip().replace(",", ".")
         if not name or not pts: return
-        conn = get_db()
         try:
-            conn.execute("INSERT INTO staff (StaffName, Points) VALUES (?, ?)", (name, float(pts)))
-            conn.commit(); refresh_staff_checklist(); win.destroy()
+            store.add_staff(name, float(pts))
+            refresh_staff_checklist(); win.destroy()
         except Exception as e: messagebox.showerror("Error", str(e))
-        finally: conn.close()
         
     tk.Button(win, text="Save", command=save).pack(pady=15)
     
@@ -381,40 +345,32 @@ def open_monthly_summary(fr, to):
     tk.Button(win, text="Export Per-Staff", command=lambda: export_staff_range(fr, to)).pack(pady=5)
 
 def show_summary_data(fr, to, con):
-    # READ FROM SQL, NOT EXCEL
-    df = get_logs_df()
-    if df.empty: return
-
-    df["Date"] = pd.to_datetime(df["Date"]).dt.normalize()
+    # Aggregated by the store, not Pandas
     fr, to = fr.normalize(), to.normalize()
-    
-    staff_df = df[(df["Date"] >= fr) & (df["Date"] <= to) & (df["Staff"] != "TOTAL")]
-    total_df = df[(df["Date"] >= fr) & (df["Date"] <= to) & (df["Staff"] == "TOTAL")]
+    d_fr, d_to = fr.strftime("%Y-%m-%d"), to.strftime("%Y-%m-%d")
 
-    summ = staff_df.groupby("Staff")["Share (€)"].sum().reset_index()
+    summ = store.staff_totals(d_fr, d_to)
+    totals = store.day_totals(d_fr, d_to)
 
     tk.Label(con, text=f"{fr.date()} – {to.date()}", font=("Segoe UI Semibold", 12)).pack(pady=5)
     tbl = tk.Frame(con); tbl.pack()
     tk.Label(tbl, text="Staff").grid(row=0, column=0)
     tk.Label(tbl, text="Tips (€)").grid(row=0, column=1)
 
-    for i, r in summ.iterrows():
-        tk.Label(tbl, text=r["Staff"]).grid(row=i+1, column=0)
-        tk.Label(tbl, text=f"{r['Share (€)']:.2f}").grid(row=i+1, column=1)
+    for i, r in enumerate(summ):
+        tk.Label(tbl, text=r["staff_name"]).grid(row=i+1, column=0)
+        tk.Label(tbl, text=f"{r['share']:.2f}").grid(row=i+1, column=1)
 
-    k_total = pd.to_numeric(total_df["Kitchen (€)"], errors="coerce").sum()
-    d_total = pd.to_numeric(total_df["Damage (€)"], errors="coerce").sum()
+    k_total = sum(r["kitchen"] or 0 for r in totals)
+    d_total = sum(r["damage"] or 0 for r in totals)
     tk.Label(con, text=f"Kitchen: €{k_total:.2f}").pack(pady=4)
     tk.Label(con, text=f"Damage: €{d_total:.2f}").pack()
 
 def open_logs_by_date(date_str):
     win = tk.Toplevel(root); win.geometry("850x520")
-    df = get_logs_df()
-    if df.empty: tk.Label(win, text="No Logs").pack(); return
-    
-    df["Date"] = pd.to_datetime(df["Date"]).dt.normalize()
-    target = pd.to_datetime(date_str).normalize()
-    df_day = df[df["Date"] == target]
+    target = pd.to_datetime(date_str, errors="coerce")
+    if pd.isna(target): tk.Label(win, text="No logs").pack(); return
+    df_day = get_logs_df(target, target)
 
     if df_day.empty: tk.Label(win, text="No logs").pack(); return
 
@@ -434,28 +390,25 @@ def open_logs_by_date(date_str):
     tk.Label(frame, text=summary_txt, bg="#f0e6d6").pack(pady=10)
 
 def edit_entry_for_date(sel_date):
-    # Fully converted to SQL
     try:
-        conn = get_db()
         # Check if logs exist
-        logs = conn.execute("SELECT * FROM tip_logs WHERE date = ?", (sel_date,)).fetchall()
+        logs = store.get_day(sel_date)
         if not logs:
-            messagebox.showinfo("Info", "No logs for this date"); conn.close(); return
+            messagebox.showinfo("Info", "No logs for this date"); return
             
         # Get total row
         tot_row = next((r for r in logs if r["staff_name"] == "TOTAL"), None)
         if not tot_row: 
-            messagebox.showerror("Error", "Corrupt log (Missing TOTAL)"); conn.close(); return
+            messagebox.showerror("Error", "Corrupt log (Missing TOTAL)"); return
             
         tips_today = tot_row["share"] + tot_row["kitchen"] + tot_row["damage"]
         
         # Get staff list for checklist
-        all_staff = conn.execute("SELECT StaffName, Points FROM staff").fetchall()
+        all_staff = store.list_staff()
         pts_lookup = {r["StaffName"]: r["Points"] for r in all_staff}
         
         # Who worked? (Names currently in log)
         worked_names = [r["staff_name"] for r in logs if r["staff_name"] != "TOTAL"]
-        conn.close()
 
         dlg = tk.Toplevel(root); dlg.geometry("600x800")
         tips_var = tk.StringVar(value=str(tips_today))
@@ -480,17 +433,10 @@ def edit_entry_for_date(sel_date):
                 
                 total_pts = sum(pts_lookup[n] for n in chosen)
                 
-                conn = get_db()
-                conn.execute("DELETE FROM tip_logs WHERE date = ?", (sel_date,))
-                
-                for name in chosen:
-                    share = round((pts_lookup[name] / total_pts) * net, 2)
-                    conn.execute("INSERT INTO tip_logs (date, staff_name, points, share, kitchen, damage) VALUES (?, ?, ?, ?, ?, ?)",
-                                 (sel_date, name, pts_lookup[name], share, 0, 0))
-                
-                conn.execute("INSERT INTO tip_logs (date, staff_name, points, share, kitchen, damage) VALUES (?, ?, ?, ?, ?, ?)",
-                             (sel_date, "TOTAL", 0, net, kitchen, damage))
-                conn.commit(); conn.close()
+                rows = [(name, pts_lookup[name], round((pts_lookup[name] / total_pts) * net, 2), 0, 0)
+                        for name in chosen]
+                rows.append(("TOTAL", 0, net, kitchen, damage))
+                store.record_day(sel_date, rows)
                 messagebox.showinfo("Saved", "Updated"); dlg.destroy()
             except Exception as e: messagebox.showerror("Error", str(e))
 
@@ -500,9 +446,7 @@ def edit_entry_for_date(sel_date):
 
 def delete_entry(date_str):
     if messagebox.askyesno("Confirm", f"Delete {date_str}?"):
-        conn = get_db()
-        conn.execute("DELETE FROM tip_logs WHERE date = ?", (date_str,))
-        conn.commit(); conn.close()
+        store.delete_day(date_str)
         messagebox.showinfo("Deleted", "Entry removed.")
 
 # ── EXPORT FUNCTIONS (RESTORED STYLES) ─────────────────────────────────
@@ -584,12 +528,12 @@ def export_range_report(d_from, d_to):
             title="Save Report As…")
         if not path: return
 
-        df = get_logs_df()
-        if df.empty: return
+        df = get_logs_df(d_from, d_to)
+        if df.empty:
+            messagebox.showinfo("No Data", "Nothing logged in that range."); return
         
-        # Filter by Date and TOTAL
-        mask = (df["Staff"] == "TOTAL") & (df["Date"] >= d_from) & (df["Date"] <= d_to)
-        wk = df[mask].sort_values("Date")
+        # Filter for TOTAL rows only
+        wk = df[df["Staff"] == "TOTAL"].sort_values("Date")
 
         if wk.empty:
             messagebox.showinfo("No Data", "Nothing logged in that range."); return
@@ -628,11 +572,11 @@ def export_staff_range(d_from, d_to):
             title="Save Staff Report As…")
         if not path: return
 
-        df = get_logs_df()
-        if df.empty: return
+        df = get_logs_df(d_from, d_to)
+        if df.empty:
+            messagebox.showinfo("No Data", "No entries in that range."); return
 
-        mask = (df["Date"] >= d_from) & (df["Date"] <= d_to) & (df["Staff"] != "TOTAL")
-        staff = df[mask]
+        staff = df[df["Staff"] != "TOTAL"]
 
         if staff.empty:
             messagebox.showinfo("No Data", "No entries in that range."); return
@@ -0,0 +1,376 @@
+"""Storage backends for the tip app.
+
+Every backend speaks the same small interface (staff CRUD, record / replace a
+day, range queries and aggregates), so the GUI never touches a driver directly
+and the same workload can be run against any engine:
+
+* ``SQLiteStore``  – the single ``tips_data.db`` file the app has always used.
+* ``MemoryStore``  – plain Python structures, for fast test and benchmark runs.
+* ``ServerStore``  – a pooled connection to a server database (PostgreSQL via
+  ``from_dsn``), or a local WAL‑mode SQLite stand‑in via ``local``.
+
+Dates are ``YYYY-MM-DD`` strings throughout, so range bounds are inclusive and
+compare lexically.  Names sort by code point on every backend (PostgreSQL
+queries use ``COLLATE "C"`` rather than the database locale).  Rows come back as plain dicts keyed like the original
+tables (``StaffID``/``StaffName``/``Points`` and ``date``/``staff_name``/…).
+"""
+import itertools, os, queue, sqlite3, tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+TOTAL = "TOTAL"  # staff_name of the per-day summary row
+
+# ``{c}`` is filled with the dialect's code-point collation (see ``COLLATE``).
+STAFF_ORDER = {
+    "id":     "StaffID",
+    "name":   "StaffName{c} ASC",
+    "points": "Points DESC, StaffName{c} ASC",
+}
+
+# ── INTERFACE ─────────────────────────────────────────────────────────
+
+class DuplicateStaff(Exception):
+    """Raised by ``add_staff`` when the name is already taken, on every backend."""
+
+
+class TipStore(ABC):
+    """Base class every backend implements."""
+
+    # Staff
+    @abstractmethod
+    def list_staff(self, order_by="id"):
+        """Return staff rows ordered by one of ``STAFF_ORDER``'s keys."""
+
+    @abstractmethod
+    def add_staff(self, name, points):
+        """Add a staff member; raises ``DuplicateStaff`` if the name exists."""
+
+    @abstractmethod
+    def update_points(self, staff_id, points):
+        pass
+
+    @abstractmethod
+    def remove_staff(self, names):
+        pass
+
+    # Tip logs
+    @abstractmethod
+    def record_day(self, date, rows):
+        """Replace every log row for ``date`` with ``rows`` in one go.
+
+        ``rows`` are ``(staff_name, points, share, kitchen, damage)`` tuples,
+        including the ``TOTAL`` row.
+        """
+
+    @abstractmethod
+    def delete_day(self, date):
+        pass
+
+    def get_day(self, date):
+        return self.logs_between(date, date)
+
+    @abstractmethod
+    def logs_between(self, fr=None, to=None):
+        """Log rows with ``fr <= date <= to`` (either bound optional), by date."""
+
+    # Aggregates
+    def day_totals(self, fr=None, to=None):
+        """The ``TOTAL`` row of every day in range, by date."""
+        return [r for r in self.logs_between(fr, to) if r["staff_name"] == TOTAL]
+
+    def staff_totals(self, fr=None, to=None):
+        """``{"staff_name", "share"}`` summed per staff member, by name."""
+        sums = {}
+        for r in self.logs_between(fr, to):
+            if r["staff_name"] != TOTAL:
+                sums[r["staff_name"]] = sums.get(r["staff_name"], 0.0) + r["share"]
+        return [{"staff_name": n, "share": s} for n, s in sorted(sums.items())]
+
+    def close(self):
+        pass
+
+# ── IN-MEMORY ─────────────────────────────────────────────────────────
+
+class MemoryStore(TipStore):
+    """Dict/list backed store; nothing touches disk.
+
+    Numbers are stored as floats so rows compare equal to the SQL backends'.
+    """
+
+    def __init__(self):
+        self._staff = {}                       # StaffID -> row
+        self._logs = []
+        self._staff_ids = itertools.count(1)
+        self._log_ids = itertools.count(1)
+
+    def list_staff(self, order_by="id"):
+        key = {
+            "id":     lambda r: r["StaffID"],
+            "name":   lambda r: r["StaffName"],
+            "points": lambda r: (-r["Points"], r["StaffName"]),
+        }[order_by]
+        return [dict(r) for r in sorted(self._staff.values(), key=key)]
+
+    def add_staff(self, name, points):
+        if any(r["StaffName"] == name for r in self._staff.values()):
+            raise DuplicateStaff(f"Staff '{name}' already exists")
+        sid = next(self._staff_ids)
+        self._staff[sid] = {"StaffID": sid, "StaffName": name, "Points": float(points)}
+
+    def update_points(self, staff_id, points):
+        if staff_id in self._staff:
+            self._staff[staff_id]["Points"] = float(points)
+
+    def remove_staff(self, names):
+        names = set(names)
+        self._staff = {k: r for k, r in self._staff.items() if r["StaffName"] not in names}
+
+    def record_day(self, date, rows):
+        new = [{"id": next(self._log_ids), "date": date, "staff_name": n,
+                "points": float(p), "share": float(s), "kitchen": float(k), "damage": float(d)}
+               for n, p, s, k, d in rows]
+        self.delete_day(date)
+        self._logs.extend(new)
+
+    def delete_day(self, date):
+        self._logs = [r for r in self._logs if r["date"] != date]
+
+    def logs_between(self, fr=None, to=None):
+        hits = [r for r in self._logs
+                if (fr is None or r["date"] >= fr) and (to is None or r["date"] <= to)]
+        return [dict(r) for r in sorted(hits, key=lambda r: (r["date"], r["id"]))]
+
+# ── SQL BACKENDS ──────────────────────────────────────────────────────
+
+DDL = {
+    "sqlite": (
+        """CREATE TABLE IF NOT EXISTS staff (
+            StaffID INTEGER PRIMARY KEY AUTOINCREMENT,
+            StaffName TEXT UNIQUE,
+            Points REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS tip_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            staff_name TEXT,
+            points REAL,
+            share REAL,
+            kitchen REAL,
+            damage REAL
+        )""",
+    ),
+    "postgres": (
+        """CREATE TABLE IF NOT EXISTS staff (
+            StaffID SERIAL PRIMARY KEY,
+            StaffName TEXT UNIQUE,
+            Points DOUBLE PRECISION
+        )""",
+        """CREATE TABLE IF NOT EXISTS tip_logs (
+            id SERIAL PRIMARY KEY,
+            date TEXT,
+            staff_name TEXT,
+            points DOUBLE PRECISION,
+            share DOUBLE PRECISION,
+            kitchen DOUBLE PRECISION,
+            damage DOUBLE PRECISION
+        )""",
+    ),
+}
+
+COLLATE = {"sqlite": "", "postgres": ' COLLATE "C"'}
+
+# Quoted aliases keep the mixed-case keys on servers that fold identifiers.
+STAFF_COLS = 'StaffID AS "StaffID", StaffName AS "StaffName", Points AS "Points"'
+LOG_COLS = "id, date, staff_name, points, share, kitchen, damage"
+
+
+class _SQLStore(TipStore):
+    """Shared SQL for the DB-API backends; subclasses supply ``_conn``."""
+
+    dialect = "sqlite"
+    driver = sqlite3  # DB-API module, for its exception classes
+
+    @abstractmethod
+    def _conn(self):
+        """Context manager yielding a live connection."""
+
+    def _sql(self, sql):
+        # Queries are written with qmark placeholders; psycopg2 wants %s.
+        return sql.replace("?", "%s") if self.dialect == "postgres" else sql
+
+    @contextmanager
+    def _tx(self):
+        """Yield a cursor; commit on success, roll back on any error."""
+        with self._conn() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def _query(self, sql, params=()):
+        with self._tx() as cur:
+            cur.execute(self._sql(sql), params)
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def _exec(self, sql, params=()):
+        with self._tx() as cur:
+            cur.execute(self._sql(sql), params)
+
+    def init_schema(self):
+        with self._tx() as cur:
+            for stmt in DDL[self.dialect]:
+                cur.execute(stmt)
+
+    def list_staff(self, order_by="id"):
+        order = STAFF_ORDER[order_by].format(c=COLLATE[self.dialect])
+        return self._query(f"SELECT {STAFF_COLS} FROM staff ORDER BY {order}")
+
+    def add_staff(self, name, points):
+        try:
+            self._exec("INSERT INTO staff (StaffName, Points) VALUES (?, ?)", (name, points))
+        except self.driver.IntegrityError as e:
+            raise DuplicateStaff(f"Staff '{name}' already exists") from e
+
+    def update_points(self, staff_id, points):
+        self._exec("UPDATE staff SET Points = ? WHERE StaffID = ?", (points, staff_id))
+
+    def remove_staff(self, names):
+        with self._tx() as cur:
+            for name in names:
+                cur.execute(self._sql("DELETE FROM staff WHERE StaffName = ?"), (name,))
+
+    def record_day(self, date, rows):
+        with self._tx() as cur:
+            cur.execute(self._sql("DELETE FROM tip_logs WHERE date = ?"), (date,))
+            cur.executemany(
+                self._sql("INSERT INTO tip_logs (date, staff_name, points, share, kitchen, damage) "
+                          "VALUES (?, ?, ?, ?, ?, ?)"),
+                [(date, *r) for r in rows])
+
+    def delete_day(self, date):
+        self._exec("DELETE FROM tip_logs WHERE date = ?", (date,))
+
+    def _range(self, fr, to):
+        where, params = [], []
+        if fr is not None: where.append("date >= ?"); params.append(fr)
+        if to is not None: where.append("date <= ?"); params.append(to)
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def logs_between(self, fr=None, to=None):
+        where, params = self._range(fr, to)
+        return self._query(f"SELECT {LOG_COLS} FROM tip_logs{where} ORDER BY date, id", params)
+
+    def day_totals(self, fr=None, to=None):
+        where, params = self._range(fr, to)
+        where += (" AND" if where else " WHERE") + " staff_name = ?"
+        return self._query(f"SELECT {LOG_COLS} FROM tip_logs{where} ORDER BY date, id",
+                           params + [TOTAL])
+
+    def staff_totals(self, fr=None, to=None):
+        where, params = self._range(fr, to)
+        where += (" AND" if where else " WHERE") + " staff_name <> ?"
+        return self._query(f"SELECT staff_name, SUM(share) AS share FROM tip_logs{where} "
+                           f"GROUP BY staff_name ORDER BY staff_name{COLLATE[self.dialect]}",
+                           params + [TOTAL])
+
+
+class SQLiteStore(_SQLStore):
+    """The app's original single-file database; one connection per call."""
+
+    def __init__(self, path):
+        self.path = path
+        self.init_schema()
+
+    @contextmanager
+    def _conn(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+class ServerStore(_SQLStore):
+    """A fixed-size connection pool in front of a server database.
+
+    ``connect`` is any zero-argument DB-API connection factory, ``driver`` its
+    module and ``dialect`` a key of ``DDL``; both are required so the server can be swapped for a local stand-in without
+    touching the query code.  A connection that fails with a connection-level
+    error (or reports itself closed) is dropped and reopened on next use.
+    """
+
+    def __init__(self, connect, *, dialect, driver, size=4):
+        self.dialect = dialect
+        self.driver = driver
+        self._connect = connect
+        self._pool = queue.Queue(maxsize=size)
+        try:
+            for _ in range(size):
+                self._pool.put(connect())
+            self.init_schema()
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def from_dsn(cls, dsn, size=4):
+        """Pool of PostgreSQL connections (needs ``psycopg2``)."""
+        import psycopg2
+        return cls(lambda: psycopg2.connect(dsn), size=size, dialect="postgres", driver=psycopg2)
+
+    @classmethod
+    def local(cls, size=4):
+        """Pooled stand-in: a WAL-mode SQLite file in a private temp directory.
+
+        WAL lets readers run alongside the writer and the busy timeout makes
+        concurrent writers wait, so the pool can be used from several threads.
+        """
+        tmp = tempfile.TemporaryDirectory(prefix="tips_")
+        path = os.path.join(tmp.name, "tips.db")
+
+        def connect():
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            return conn
+
+        try:
+            store = cls(connect, size=size, dialect="sqlite", driver=sqlite3)
+        except Exception:
+            tmp.cleanup()
+            raise
+        store._tmp = tmp
+        return store
+
+    @contextmanager
+    def _conn(self):
+        conn = self._pool.get()
+        try:
+            if conn is None or getattr(conn, "closed", False):
+                conn = self._connect()
+            yield conn
+        except (self.driver.OperationalError, self.driver.InterfaceError):
+            # Possibly a dead connection: never hand it out again.
+            self._discard(conn)
+            conn = None
+            raise
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            if conn is not None: conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while not self._pool.empty():
+            self._discard(self._pool.get_nowait())
+        if getattr(self, "_tmp", None):
+            self._tmp.cleanup()
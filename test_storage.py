@@ -0,0 +1,139 @@
+import os, threading
+
+import pytest
+
+from storage import DuplicateStaff, MemoryStore, ServerStore, SQLiteStore
+
+
+def postgres_store():
+    """Fresh ``ServerStore`` on the database in TIPS_TEST_DSN (skips if unset)."""
+    dsn = os.environ.get("TIPS_TEST_DSN")
+    if not dsn:
+        pytest.skip("TIPS_TEST_DSN not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS staff, tip_logs")
+    conn.close()
+    return ServerStore.from_dsn(dsn)
+
+
+@pytest.fixture(params=["memory", "sqlite", "server", "postgres"])
+def store(request, tmp_path):
+    s = {
+        "memory": MemoryStore,
+        "sqlite": lambda: SQLiteStore(tmp_path / "x.db"),
+        "server": ServerStore.local,
+        "postgres": postgres_store,
+    }[request.param]()
+    yield s
+    s.close()
+
+
+def workload(s):
+    """Exercise every store method and return everything observable."""
+    s.add_staff("Bob", 2)
+    s.add_staff("Al", 2)
+    s.add_staff("Cy", 3)
+    s.add_staff("al", 1)  # sorts after "Cy" by code point, before it in most locales
+    with pytest.raises(DuplicateStaff):
+        s.add_staff("Bob", 1)
+
+    cy = next(r for r in s.list_staff() if r["StaffName"] == "Cy")
+    s.update_points(cy["StaffID"], 1.5)
+
+    s.record_day("2024-01-01", [("Al", 2, 10, 0, 0), ("TOTAL", 0, 10, 3, 1)])
+    s.record_day("2024-01-02", [("Al", 2, 5, 0, 0), ("Bob", 2, 5, 0, 0), ("TOTAL", 0, 10, 3, 1)])
+    s.record_day("2024-01-02", [("Al", 2, 6, 0, 0), ("TOTAL", 0, 6, 3, 1)])  # replaces the day
+    s.record_day("2024-01-05", [("Cy", 1.5, 4, 0, 0), ("TOTAL", 0, 4, 1, 0)])
+    s.delete_day("2024-01-05")
+    s.remove_staff(["Bob"])
+
+    strip = lambda rows: [{k: v for k, v in r.items() if k != "id"} for r in rows]
+    return {
+        "by_id":     s.list_staff(),
+        "by_name":   s.list_staff("name"),
+        "by_points": s.list_staff("points"),
+        "all":       strip(s.logs_between()),
+        "upto":      strip(s.logs_between(to="2024-01-01")),
+        "day":       strip(s.get_day("2024-01-02")),
+        "totals":    strip(s.day_totals("2024-01-01", "2024-01-31")),
+        "staff":     s.staff_totals("2024-01-01", "2024-01-31"),
+    }
+
+
+def test_workload(store):
+    got = workload(store)
+    assert [r["StaffName"] for r in got["by_points"]] == ["Al", "Cy", "al"]
+    assert [r["StaffName"] for r in got["by_name"]] == ["Al", "Cy", "al"]
+    assert got["by_points"][1]["Points"] == 1.5
+    assert len(got["day"]) == 2
+    assert got["upto"] == [
+        {"date": "2024-01-01", "staff_name": "Al", "points": 2.0, "share": 10.0, "kitchen": 0.0, "damage": 0.0},
+        {"date": "2024-01-01", "staff_name": "TOTAL", "points": 0.0, "share": 10.0, "kitchen": 3.0, "damage": 1.0},
+    ]
+    assert [r["date"] for r in got["totals"]] == ["2024-01-01", "2024-01-02"]
+    assert got["staff"] == [{"staff_name": "Al", "share": 16.0}]
+
+
+@pytest.mark.parametrize("with_postgres", [False, True])
+def test_backends_agree(tmp_path, with_postgres):
+    stores = [MemoryStore(), SQLiteStore(tmp_path / "x.db"), ServerStore.local()]
+    try:
+        if with_postgres:
+            stores.append(postgres_store())
+        results = [workload(s) for s in stores]
+    finally:
+        for s in stores: s.close()
+    assert all(r == results[0] for r in results[1:])
+
+
+def test_server_pool_concurrent():
+    store = ServerStore.local(size=4)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(200):
+                date = f"2024-{n + 1:02d}-{i % 28 + 1:02d}"
+                store.record_day(date, [("Al", 2, i, 0, 0), ("TOTAL", 0, i, 1, 1)])
+                store.logs_between(f"2024-{n + 1:02d}-01", f"2024-{n + 1:02d}-31")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    try:
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert errors == []
+        assert len(store.day_totals()) == 4 * 28
+    finally:
+        store.close()
+
+
+def test_server_pool_replaces_dead_connection():
+    store = ServerStore.local(size=1)
+    try:
+        store.add_staff("Al", 2)
+        store._pool.get().close()
+        store._pool.put(type("Dead", (), {"closed": 1})())  # as psycopg2 flags a dropped link
+        assert [r["StaffName"] for r in store.list_staff()] == ["Al"]
+    finally:
+        store.close()
+
+
+def test_server_pool_closes_connections_when_setup_fails():
+    import sqlite3
+    opened = []
+
+    def connect():
+        if len(opened) == 2:
+            raise sqlite3.OperationalError("server went away")
+        opened.append(sqlite3.connect(":memory:"))
+        return opened[-1]
+
+    with pytest.raises(sqlite3.OperationalError):
+        ServerStore(connect, dialect="sqlite", driver=sqlite3)
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):  # already closed
+            conn.cursor()